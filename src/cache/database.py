@@ -313,6 +313,36 @@ class CacheDatabase:
             """, params).fetchall()
             return [self._row_to_threat(row) for row in rows]
     
+    def get_crown_jewel_heatmap(
+        self,
+        crown_jewels: list[str],
+        since_hours: int = 24
+    ) -> dict[str, dict]:
+        """Get per-crown-jewel threat counts by priority in a single query."""
+        heat_map = {
+            cj: {"threat_count": 0, "critical_count": 0, "high_count": 0}
+            for cj in crown_jewels
+        }
+        if not crown_jewels:
+            return heat_map
+        
+        since = (datetime.utcnow() - timedelta(hours=since_hours)).isoformat()
+        placeholders = ", ".join("?" for _ in crown_jewels)
+        with self._get_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT cj.value AS crown_jewel, t.priority_level, COUNT(DISTINCT t.id) AS n
+                FROM threats t, json_each(t.affected_crown_jewels) cj
+                WHERE cj.value IN ({placeholders}) AND t.published_utc >= ?
+                GROUP BY cj.value, t.priority_level
+            """, [*crown_jewels, since]).fetchall()
+        
+        for row in rows:
+            counts = heat_map[row["crown_jewel"]]
+            counts["threat_count"] += row["n"]
+            if row["priority_level"] in ("critical", "high"):
+                counts[f"{row['priority_level']}_count"] += row["n"]
+        return heat_map
+    
     def get_threat_stats(self, since_hours: int = 24) -> dict:
         """Get threat statistics for dashboard."""
         since = (datetime.utcnow() - timedelta(hours=since_hours)).isoformat()
@@ -1,6 +1,12 @@
 """Dashboard API endpoints for threat intelligence visualization."""
 
-from datetime import datetime, timedelta
+import json
+import logging
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,9 +15,47 @@ from sqlalchemy import select, func, text
 from app.database import get_db
 from app.auth import verify_api_token
 from app.models.database import ReportDB
+from app.services.dashboard_cache import get_cache_or_none
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/dashboard", tags=["dashboard"])
 
+_CROWN_JEWELS_PATH = (
+    Path(__file__).parent.parent.parent.parent.parent / "config" / "user-preferences.json"
+)
+
+# Alert payload keys and the ThreatRecord attributes they are read from
+_ALERT_KEYS = (
+    "id", "title", "priority", "cvss", "epss", "kev_listed",
+    "cves", "source", "published", "affected_crown_jewels",
+)
+_alert_attrs = attrgetter(
+    "id", "title", "priority_level", "cvss_v3", "epss_score", "kev_listed",
+    "cves", "source_name", "published_utc", "affected_crown_jewels",
+)
+
+
+@lru_cache(maxsize=1)
+def _load_crown_jewels(mtime: float) -> tuple[str, ...]:
+    """Load crown jewels from user preferences, cached per file mtime."""
+    config = json.loads(_CROWN_JEWELS_PATH.read_bytes())
+    return tuple(config.get("crown_jewels", []))
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching stored timestamps."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _feed_status(overall_score: float) -> str:
+    """Map a feed's overall quality score to a health status."""
+    if overall_score < 50:
+        return "critical"
+    if overall_score < 70:
+        return "degraded"
+    return "healthy"
+
 
 @router.get("/stats", dependencies=[Depends(verify_api_token)])
 async def get_dashboard_stats(
@@ -23,29 +67,30 @@ async def get_dashboard_stats(
     
     Returns counts of threats by severity, KEV status, and other metrics.
     """
-    since = datetime.utcnow() - timedelta(hours=hours)
+    now = _utcnow()
+    since = now - timedelta(hours=hours)
     
-    # Get report counts by type
+    # Get report counts by type, with the overall total as a window sum
     report_counts = {}
+    total_reports = 0
     result = await db.execute(
-        select(ReportDB.report_type, func.count(ReportDB.id))
+        select(
+            ReportDB.report_type,
+            func.count(ReportDB.id),
+            func.sum(func.count(ReportDB.id)).over(),
+        )
         .where(ReportDB.created_at >= since)
         .group_by(ReportDB.report_type)
     )
-    for row in result:
-        report_counts[row[0]] = row[1]
-    
-    # Total reports
-    total_result = await db.execute(
-        select(func.count(ReportDB.id)).where(ReportDB.created_at >= since)
-    )
-    total_reports = total_result.scalar() or 0
+    for report_type, count, total in result:
+        report_counts[report_type] = count
+        total_reports = total
     
     # Calculate threat stats from report metadata
     # This will be enhanced when we integrate with the SQLite cache
     stats = {
         "time_window_hours": hours,
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now,
         "reports": {
             "total": total_reports,
             "by_type": report_counts,
@@ -66,17 +111,13 @@ async def get_dashboard_stats(
         }
     }
     
-    # Try to get threat stats from the SQLite cache
-    try:
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "src"))
-        from cache import CacheDatabase
-        
-        cache_db = CacheDatabase()
-        threat_stats = cache_db.get_threat_stats(since_hours=hours)
-        stats["threats"] = threat_stats
-    except Exception:
-        pass  # Cache not available, use defaults
+    # Get threat stats from the SQLite cache if available
+    cache_db = get_cache_or_none()
+    if cache_db is not None:
+        try:
+            stats["threats"] = cache_db.get_threat_stats(since_hours=hours)
+        except sqlite3.Error as e:
+            logger.warning("Threat cache query failed, using defaults: %s", e)
     
     return stats
 
@@ -91,23 +132,24 @@ async def get_threat_trends(
     
     Returns daily counts for visualization.
     """
-    trends = []
+    now = _utcnow()
+    trends = None
     
-    # Try to get trends from SQLite cache
-    try:
-        from pathlib import Path
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "src"))
-        from cache import CacheDatabase
-        
-        cache_db = CacheDatabase()
-        trends = cache_db.get_threat_trends(days=days)
-    except Exception:
+    cache_db = get_cache_or_none()
+    if cache_db is not None:
+        try:
+            trends = cache_db.get_threat_trends(days=days)
+        except sqlite3.Error as e:
+            logger.warning("Threat cache query failed, using defaults: %s", e)
+
+    if trends is None:
         # Generate placeholder data from reports
+        trends = []
+        today = now.date()
         for i in range(days):
-            day = (datetime.utcnow() - timedelta(days=i)).date()
+            day = today - timedelta(days=i)
             trends.append({
-                "day": day.isoformat(),
+                "day": day,
                 "total": 0,
                 "critical": 0,
                 "high": 0,
@@ -116,7 +158,7 @@ async def get_threat_trends(
     
     return {
         "days": days,
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now,
         "trends": trends,
     }
 
@@ -131,37 +173,30 @@ async def get_crown_jewel_threats(
     
     Returns heat map data for crown jewel visualization.
     """
+    now = _utcnow()
+
     # Load crown jewels from config
-    crown_jewels = []
+    crown_jewels = ()
     try:
-        from pathlib import Path
-        import json
-        config_path = Path(__file__).parent.parent.parent.parent.parent / "config" / "user-preferences.json"
-        if config_path.exists():
-            with open(config_path) as f:
-                config = json.load(f)
-            crown_jewels = config.get("crown_jewels", [])
+        if _CROWN_JEWELS_PATH.exists():
+            crown_jewels = _load_crown_jewels(_CROWN_JEWELS_PATH.stat().st_mtime)
     except Exception:
         pass
     
     # Get threat counts per crown jewel from cache
     heat_map = []
-    try:
-        from pathlib import Path
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "src"))
-        from cache import CacheDatabase
-        
-        cache_db = CacheDatabase()
+    counts = None
+    cache_db = get_cache_or_none()
+    if cache_db is not None:
+        try:
+            counts = cache_db.get_crown_jewel_heatmap(list(crown_jewels), since_hours=hours)
+        except sqlite3.Error as e:
+            logger.warning("Threat cache query failed, using defaults: %s", e)
+
+    if counts is not None:
         for cj in crown_jewels:
-            threats = cache_db.get_threats_affecting_crown_jewels([cj], limit=100)
-            heat_map.append({
-                "crown_jewel": cj,
-                "threat_count": len(threats),
-                "critical_count": sum(1 for t in threats if t.priority_level == "critical"),
-                "high_count": sum(1 for t in threats if t.priority_level == "high"),
-            })
-    except Exception:
+            heat_map.append({"crown_jewel": cj, **counts[cj]})
+    else:
         # Return empty heat map if cache not available
         for cj in crown_jewels:
             heat_map.append({
@@ -173,7 +208,7 @@ async def get_crown_jewel_threats(
     
     return {
         "time_window_hours": hours,
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now,
         "crown_jewels": heat_map,
     }
 
@@ -187,39 +222,24 @@ async def get_recent_alerts(
     """
     Get recent threat alerts for the dashboard feed.
     """
+    now = _utcnow()
     alerts = []
     
-    try:
-        from pathlib import Path
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "src"))
-        from cache import CacheDatabase
-        
-        cache_db = CacheDatabase()
-        threats = cache_db.get_threats_by_priority(
-            priority=priority,
-            limit=limit,
-            since_hours=168  # Last week
-        )
-        
-        for t in threats:
-            alerts.append({
-                "id": t.id,
-                "title": t.title,
-                "priority": t.priority_level,
-                "cvss": t.cvss_v3,
-                "epss": t.epss_score,
-                "kev_listed": t.kev_listed,
-                "cves": t.cves,
-                "source": t.source_name,
-                "published": t.published_utc.isoformat() if t.published_utc else None,
-                "affected_crown_jewels": t.affected_crown_jewels,
-            })
-    except Exception:
-        pass
+    cache_db = get_cache_or_none()
+    if cache_db is not None:
+        try:
+            threats = cache_db.get_threats_by_priority(
+                priority=priority,
+                limit=limit,
+                since_hours=168  # Last week
+            )
+        except sqlite3.Error as e:
+            logger.warning("Threat cache query failed, using defaults: %s", e)
+        else:
+            alerts = [dict(zip(_ALERT_KEYS, _alert_attrs(t))) for t in threats]
     
     return {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now,
         "alerts": alerts,
     }
 
@@ -231,48 +251,39 @@ async def get_feed_health(
     """
     Get health status of all configured threat feeds.
     """
+    now = _utcnow()
     feeds = []
     
-    try:
-        from pathlib import Path
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "src"))
-        from cache import CacheDatabase
-        
-        cache_db = CacheDatabase()
-        metrics = cache_db.get_all_feed_metrics()
-        
-        for m in metrics:
-            status = "healthy"
-            if m.overall_score < 50:
-                status = "critical"
-            elif m.overall_score < 70:
-                status = "degraded"
-            
-            feeds.append({
-                "name": m.feed_name,
-                "url": m.feed_url,
-                "status": status,
-                "overall_score": m.overall_score,
-                "last_check": m.last_check.isoformat() if m.last_check else None,
-                "response_time_ms": m.response_time_ms,
-                "items_24h": m.items_collected_24h,
-            })
-    except Exception:
-        pass
+    cache_db = get_cache_or_none()
+    if cache_db is not None:
+        try:
+            metrics = cache_db.get_all_feed_metrics()
+        except sqlite3.Error as e:
+            logger.warning("Threat cache query failed, using defaults: %s", e)
+        else:
+            feeds = [
+                {
+                    "name": m.feed_name,
+                    "url": m.feed_url,
+                    "status": _feed_status(m.overall_score),
+                    "overall_score": m.overall_score,
+                    "last_check": m.last_check,
+                    "response_time_ms": m.response_time_ms,
+                    "items_24h": m.items_collected_24h,
+                }
+                for m in metrics
+            ]
     
     # Count by status
-    healthy = sum(1 for f in feeds if f.get("status") == "healthy")
-    degraded = sum(1 for f in feeds if f.get("status") == "degraded")
-    critical = sum(1 for f in feeds if f.get("status") == "critical")
+    status_counts = Counter(f["status"] for f in feeds)
     
     return {
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now,
         "summary": {
             "total": len(feeds),
-            "healthy": healthy,
-            "degraded": degraded,
-            "critical": critical,
+            "healthy": status_counts["healthy"],
+            "degraded": status_counts["degraded"],
+            "critical": status_counts["critical"],
         },
         "feeds": feeds,
     }
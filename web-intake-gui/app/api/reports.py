@@ -1,6 +1,6 @@
 """Report API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -46,18 +46,45 @@ async def create_report(
     dependencies=[Depends(verify_api_token)],
 )
 async def list_reports(
+    response: Response,
     report_type: ReportType | None = Query(None, description="Filter by report type"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of reports"),
     offset: int = Query(0, ge=0, description="Number of reports to skip"),
+    cursor: str | None = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """
     List all reports with optional filtering.
 
-    Requires API token authentication.
+    When a full page is returned, the X-Next-Cursor header holds the cursor
+    for the next page. Requires API token authentication.
     """
+    before = None
+    if cursor is not None:
+        if offset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="offset cannot be combined with cursor",
+            )
+        try:
+            before = ReportService.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
     service = ReportService(db)
-    return await service.list(report_type=report_type, limit=limit, offset=offset)
+    reports = await service.list(
+        report_type=report_type, limit=limit, offset=offset, before=before
+    )
+
+    if len(reports) == limit:
+        response.headers["X-Next-Cursor"] = ReportService.encode_cursor(reports[-1])
+
+    return reports
 
 
 @router.get(
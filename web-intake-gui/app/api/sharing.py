@@ -1,18 +1,102 @@
 """Share link API endpoints."""
 
+import asyncio
+import gzip
+import hashlib
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse, Response
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.auth import verify_api_token
 from app.models.share import ShareLinkCreate, ShareLinkResponse
 from app.services.share_service import ShareService
-from app.services.report_service import ReportService
 from app.services.pdf_service import PDFService
 
 router = APIRouter(tags=["sharing"])
 
+# Templates are compiled once per process and never reloaded; report fields
+# are user-provided, so everything is escaped unless marked safe
+_templates = Environment(
+    loader=FileSystemLoader(Path(__file__).parent.parent / "templates"),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    cache_size=-1,
+)
+SHARED_REPORT_TPL = _templates.get_template("shared_report.html")
+PASSWORD_FORM_TPL = _templates.get_template("password_form.html")
+ERROR_TPL = _templates.get_template("error.html")
+
+# Report type icons and names
+TYPE_CONFIG = {
+    "executive-brief": ("📈", "Executive Brief"),
+    "technical-alert": ("🚨", "Technical Alert"),
+    "weekly-summary": ("📅", "Weekly Summary"),
+    "threats": ("🛡️", "Threat Report"),
+    "cve-analysis": ("🔍", "CVE Analysis"),
+    "critical": ("🔴", "Critical Alert"),
+}
+
+# Classification colors
+CLASS_COLORS = {
+    "PUBLIC": "bg-green-100 text-green-800",
+    "INTERNAL": "bg-yellow-100 text-yellow-800",
+    "CONFIDENTIAL": "bg-red-100 text-red-800",
+}
+
+
+def _cvss_class(score: float) -> str:
+    """Highlight critical and high CVSS scores."""
+    if score >= 9.0:
+        return "text-red-600"
+    if score >= 7.0:
+        return "text-orange-600"
+    return ""
+
+
+# Metadata items shown on shared reports, in display order:
+# (field, label, CSS class or function of the value, formatter)
+META_FIELDS = (
+    ("threat_count", "Threats", "", str),
+    ("critical_count", "Critical", "text-red-600", str),
+    ("high_count", "High", "text-orange-600", str),
+    ("kev_count", "KEV", "text-red-700", str),
+    ("crown_jewels_affected", "Affected", "", ", ".join),
+    ("cve_id", "CVE", "", str),
+    ("cvss_score", "CVSS", _cvss_class, str),
+    ("epss_score", "EPSS", "", "{:.1%}".format),
+)
+
+# Shared pages are cached only by the viewer's browser: share links can be
+# revoked, so shared proxies must not keep serving them
+_HTML_CACHE_CONTROL = "private, max-age=300"
+_PDF_CACHE_CONTROL = "private, max-age=3600, immutable"
+
+# Characters stripped from report titles when building download filenames
+_SAFE_TITLE_RE = re.compile(r"[^\w -]")
+
+# Rendered report pages keyed by (report_id, generated_at, allow_download),
+# with the share token left as a placeholder so all links share one entry
+_RENDER_CACHE_SIZE = 512
+_TOKEN_PLACEHOLDER = "__SHARE_TOKEN__"
+_rendered_reports: OrderedDict[tuple, str] = OrderedDict()
+
+
+def _encode_page(html: str) -> tuple[bytes, bytes]:
+    """Encode a static page once, along with its gzip-compressed copy."""
+    body = html.encode()
+    return body, gzip.compress(body, 9)
+
+
+# The password form submits back to the current URL, so it never varies
+_PASSWORD_FORM_PAGE = _encode_page(PASSWORD_FORM_TPL.render())
+
 
 @router.post(
     "/api/v1/reports/{report_id}/share",
@@ -113,6 +197,7 @@ async def delete_share_link(
 @router.get("/s/{token}", response_class=HTMLResponse)
 async def view_shared_report(
     token: str,
+    request: Request,
     password: str | None = Query(None, description="Password for protected shares"),
     db: AsyncSession = Depends(get_db),
 ):
@@ -127,27 +212,27 @@ async def view_shared_report(
 
         # If password required, show password form
         if error_message == "Password required":
-            return _password_form_html(token)
+            return _page_response(request, _PASSWORD_FORM_PAGE)
 
         # Otherwise show error
-        return _error_html(error_message)
-
-    report_id, allow_download = result
+        return _page_response(request, _error_page(error_message))
 
-    # Get the report
-    report_service = ReportService(db)
-    report = await report_service.get(report_id)
+    report, allow_download = result
 
-    if report is None:
-        return _error_html("Report not found")
+    etag = _etag(f"{report.id}:{report.generated_at.timestamp()}:{allow_download}")
+    headers = {"ETag": etag, "Cache-Control": _HTML_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
     # Render the report
-    return _render_report_html(report, token, allow_download)
+    html = await _render_report_html(report, token, allow_download)
+    return HTMLResponse(html, headers=headers)
 
 
 @router.get("/s/{token}/pdf")
 async def download_shared_report_pdf(
     token: str,
+    request: Request,
     password: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
 ):
@@ -163,7 +248,7 @@ async def download_shared_report_pdf(
             detail=result[1],
         )
 
-    report_id, allow_download = result
+    report, allow_download = result
 
     if not allow_download:
         raise HTTPException(
@@ -171,20 +256,16 @@ async def download_shared_report_pdf(
             detail="PDF download not allowed for this share link",
         )
 
-    # Get the report
-    report_service = ReportService(db)
-    report = await report_service.get(report_id)
+    # A report version's PDF never changes, so a matching ETag skips rendering
+    etag = f'"{PDFService.cache_key(report)}"'
+    headers = {"ETag": etag, "Cache-Control": _PDF_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    if report is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Report not found",
-        )
-
-    # Generate PDF
+    # Serve the cached PDF, generating it on first download
     pdf_service = PDFService()
     try:
-        pdf_bytes = await pdf_service.generate_pdf(report)
+        pdf_path = await pdf_service.get_or_generate_pdf(report)
     except RuntimeError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -192,214 +273,89 @@ async def download_shared_report_pdf(
         )
 
     # Create filename
-    safe_title = "".join(c for c in report.title if c.isalnum() or c in " -_")[:50]
+    safe_title = _SAFE_TITLE_RE.sub("", report.title)[:50]
     filename = f"{safe_title}.pdf"
 
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-        },
+    return FileResponse(
+        pdf_path, media_type="application/pdf", filename=filename, headers=headers
     )
 
 
-def _password_form_html(token: str) -> str:
-    """Generate password form HTML."""
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Password Required - NOMAD</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-</head>
-<body class="bg-gray-100 min-h-screen flex items-center justify-center">
-    <div class="bg-white p-8 rounded-lg shadow-lg max-w-md w-full">
-        <div class="text-center mb-6">
-            <div class="text-4xl mb-2">🔒</div>
-            <h1 class="text-xl font-semibold text-gray-800">Password Required</h1>
-            <p class="text-gray-600 mt-2">This report is protected. Enter the password to view.</p>
-        </div>
-        <form method="GET" action="/s/{token}">
-            <input
-                type="password"
-                name="password"
-                placeholder="Enter password"
-                class="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
-                required
-                autofocus
-            >
-            <button
-                type="submit"
-                class="w-full mt-4 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors"
-            >
-                View Report
-            </button>
-        </form>
-    </div>
-</body>
-</html>"""
-
-
-def _error_html(message: str) -> str:
-    """Generate error page HTML."""
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Error - NOMAD</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-</head>
-<body class="bg-gray-100 min-h-screen flex items-center justify-center">
-    <div class="bg-white p-8 rounded-lg shadow-lg max-w-md w-full text-center">
-        <div class="text-4xl mb-4">⚠️</div>
-        <h1 class="text-xl font-semibold text-gray-800 mb-2">Unable to View Report</h1>
-        <p class="text-gray-600">{message}</p>
-    </div>
-</body>
-</html>"""
-
-
-def _render_report_html(report, token: str, allow_download: bool) -> str:
-    """Render report as HTML page."""
-    from app.services.pdf_service import PDFService
-
-    pdf_service = PDFService()
-    content_html = report.content.html or pdf_service.markdown_to_html(report.content.markdown)
-
-    # Build metadata display
-    metadata_html = ""
-    if report.metadata:
-        meta = report.metadata
-        meta_items = []
-
-        if meta.period_start and meta.period_end:
-            meta_items.append(f"<span><strong>Period:</strong> {meta.period_start} to {meta.period_end}</span>")
-
-        if meta.threat_count is not None:
-            meta_items.append(f"<span><strong>Threats:</strong> {meta.threat_count}</span>")
-
-        if meta.critical_count is not None:
-            meta_items.append(f"<span class='text-red-600'><strong>Critical:</strong> {meta.critical_count}</span>")
-
-        if meta.high_count is not None:
-            meta_items.append(f"<span class='text-orange-600'><strong>High:</strong> {meta.high_count}</span>")
-
-        if meta.kev_count is not None:
-            meta_items.append(f"<span class='text-red-700'><strong>KEV:</strong> {meta.kev_count}</span>")
-
-        if meta.crown_jewels_affected:
-            meta_items.append(f"<span><strong>Affected:</strong> {', '.join(meta.crown_jewels_affected)}</span>")
-
-        if meta.cve_id:
-            meta_items.append(f"<span><strong>CVE:</strong> {meta.cve_id}</span>")
-
-        if meta.cvss_score is not None:
-            cvss_class = "text-red-600" if meta.cvss_score >= 9.0 else "text-orange-600" if meta.cvss_score >= 7.0 else ""
-            meta_items.append(f"<span class='{cvss_class}'><strong>CVSS:</strong> {meta.cvss_score}</span>")
-
-        if meta.epss_score is not None:
-            meta_items.append(f"<span><strong>EPSS:</strong> {meta.epss_score:.1%}</span>")
-
-        if meta_items:
-            metadata_html = f"""
-            <div class="flex flex-wrap gap-4 text-sm text-gray-600 mb-6 p-4 bg-gray-50 rounded-lg">
-                {' '.join(meta_items)}
-            </div>
-            """
-
-    # Report type icons and names
-    type_config = {
-        "executive-brief": ("📈", "Executive Brief"),
-        "technical-alert": ("🚨", "Technical Alert"),
-        "weekly-summary": ("📅", "Weekly Summary"),
-        "threats": ("🛡️", "Threat Report"),
-        "cve-analysis": ("🔍", "CVE Analysis"),
-        "critical": ("🔴", "Critical Alert"),
-    }
-
-    icon, type_name = type_config.get(report.report_type.value, ("📄", "Report"))
-
-    # Classification colors
-    class_colors = {
-        "PUBLIC": "bg-green-100 text-green-800",
-        "INTERNAL": "bg-yellow-100 text-yellow-800",
-        "CONFIDENTIAL": "bg-red-100 text-red-800",
-    }
-    class_color = class_colors.get(report.classification.value, "bg-gray-100 text-gray-800")
-
-    # Download button
-    download_btn = ""
-    if allow_download:
-        download_btn = f"""
-        <a href="/s/{token}/pdf" class="inline-flex items-center px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors">
-            <svg class="w-4 h-4 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z"></path>
-            </svg>
-            Download PDF
-        </a>
-        """
-
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{report.title} - NOMAD</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <style>
-        .prose h1 {{ font-size: 1.5rem; font-weight: 700; margin-top: 1.5rem; margin-bottom: 0.75rem; color: #1e40af; }}
-        .prose h2 {{ font-size: 1.25rem; font-weight: 600; margin-top: 1.25rem; margin-bottom: 0.5rem; color: #1e40af; border-bottom: 1px solid #e5e7eb; padding-bottom: 0.25rem; }}
-        .prose h3 {{ font-size: 1.1rem; font-weight: 600; margin-top: 1rem; margin-bottom: 0.5rem; color: #374151; }}
-        .prose p {{ margin: 0.75rem 0; line-height: 1.625; }}
-        .prose ul, .prose ol {{ margin: 0.5rem 0; padding-left: 1.5rem; }}
-        .prose li {{ margin: 0.25rem 0; }}
-        .prose table {{ width: 100%; border-collapse: collapse; margin: 1rem 0; }}
-        .prose th, .prose td {{ border: 1px solid #d1d5db; padding: 0.5rem; text-align: left; }}
-        .prose th {{ background: #f3f4f6; font-weight: 600; }}
-        .prose code {{ background: #f3f4f6; padding: 0.125rem 0.375rem; border-radius: 0.25rem; font-size: 0.875rem; }}
-        .prose pre {{ background: #1f2937; color: #f9fafb; padding: 1rem; border-radius: 0.5rem; overflow-x: auto; }}
-        .prose pre code {{ background: none; padding: 0; color: inherit; }}
-        .prose blockquote {{ border-left: 4px solid #2563eb; margin: 1rem 0; padding: 0.5rem 1rem; background: #eff6ff; }}
-    </style>
-</head>
-<body class="bg-gray-100 min-h-screen">
-    <div class="max-w-4xl mx-auto py-8 px-4">
-        <!-- Header -->
-        <div class="bg-white rounded-lg shadow-sm p-6 mb-6">
-            <div class="flex items-start justify-between">
-                <div class="flex items-center space-x-3">
-                    <span class="text-3xl">{icon}</span>
-                    <div>
-                        <span class="inline-block px-2 py-1 text-xs font-semibold rounded {class_color} mb-1">
-                            {report.classification.value}
-                        </span>
-                        <h1 class="text-xl font-bold text-gray-900">{report.title}</h1>
-                        <p class="text-sm text-gray-500">
-                            {type_name} &bull; {report.organization} &bull; {report.generated_at.strftime("%B %d, %Y")}
-                        </p>
-                    </div>
-                </div>
-                {download_btn}
-            </div>
-        </div>
-
-        <!-- Metadata -->
-        {metadata_html}
-
-        <!-- Content -->
-        <div class="bg-white rounded-lg shadow-sm p-6">
-            <div class="prose max-w-none">
-                {content_html}
-            </div>
-        </div>
-
-        <!-- Footer -->
-        <div class="text-center text-sm text-gray-500 mt-6">
-            Powered by NOMAD Threat Intelligence Framework
-        </div>
-    </div>
-</body>
-</html>"""
+def _etag(value: str) -> str:
+    """Build a strong ETag from a version string."""
+    return f'"{hashlib.sha256(value.encode()).hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match covers the given ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _page_response(request: Request, page: tuple[bytes, bytes]) -> Response:
+    """Serve a pre-encoded page, gzipped when the client accepts it."""
+    body, gzipped = page
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzipped
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="text/html", headers=headers)
+
+
+@lru_cache(maxsize=32)
+def _error_page(message: str) -> tuple[bytes, bytes]:
+    """Generate error page HTML; there are only a handful of messages."""
+    return _encode_page(ERROR_TPL.render(message=message))
+
+
+async def _render_report_html(report, token: str, allow_download: bool) -> str:
+    """Render report as HTML page, reusing the cached render when possible."""
+    key = (report.id, report.generated_at.timestamp(), allow_download)
+    html = _rendered_reports.get(key)
+
+    if html is None:
+        # Render off the event loop; the cache itself is only touched here
+        html = await asyncio.to_thread(_render_report_body, report, allow_download)
+        _rendered_reports[key] = html
+        if len(_rendered_reports) > _RENDER_CACHE_SIZE:
+            _rendered_reports.popitem(last=False)
+    else:
+        _rendered_reports.move_to_end(key)
+
+    return html.replace(_TOKEN_PLACEHOLDER, token)
+
+
+def _render_report_body(report, allow_download: bool) -> str:
+    """Render report HTML with a placeholder in place of the share token."""
+    # Build metadata display as (label, value, css_class) items
+    meta = report.metadata.model_dump(exclude_none=True) if report.metadata else {}
+    meta_items = []
+
+    if meta.get("period_start") and meta.get("period_end"):
+        meta_items.append(("Period", f"{meta['period_start']} to {meta['period_end']}", ""))
+
+    for field, label, css_class, fmt in META_FIELDS:
+        value = meta.get(field)
+        # Empty strings and lists are skipped; zero counts are still shown
+        if value is None or value == "" or value == []:
+            continue
+        if callable(css_class):
+            css_class = css_class(value)
+        meta_items.append((label, fmt(value), css_class))
+
+    icon, type_name = TYPE_CONFIG.get(report.report_type.value, ("📄", "Report"))
+    class_color = CLASS_COLORS.get(report.classification.value, "bg-gray-100 text-gray-800")
+
+    return SHARED_REPORT_TPL.render(
+        report=report,
+        token=_TOKEN_PLACEHOLDER,
+        allow_download=allow_download,
+        icon=icon,
+        type_name=type_name,
+        class_color=class_color,
+        meta_items=meta_items,
+        content_html=report.content.html,
+    )
@@ -1,5 +1,7 @@
 """Authentication utilities."""
 
+import hmac
+
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -25,7 +27,10 @@ async def verify_api_token(
             detail="API token not configured on server",
         )
 
-    if credentials.credentials != settings.api_token:
+    # Constant-time comparison so response timing doesn't leak the token
+    if not hmac.compare_digest(
+        credentials.credentials.encode(), settings.api_token.encode()
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API token",
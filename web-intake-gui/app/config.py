@@ -5,7 +5,7 @@ import secrets
 from pathlib import Path
 from functools import lru_cache
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -21,11 +21,19 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/nomad_web.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 3600
 
     # Share links
     share_expiry_hours: int = 72
     share_token_length: int = 24
 
+    # PDF generation
+    pdf_timeout_seconds: int = 120
+    pdf_cache_max_age_hours: int = 168
+
     # Paths
     data_dir: Path = Path("./data")
     reports_dir: Path = Path("./data/reports")
@@ -33,9 +41,12 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: list[str] = ["*"]
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    @property
+    def pdf_cache_dir(self) -> Path:
+        """Directory for cached PDF renders."""
+        return self.reports_dir / "pdf_cache"
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
 @lru_cache
@@ -46,5 +57,6 @@ def get_settings() -> Settings:
     # Ensure directories exist
     settings.data_dir.mkdir(parents=True, exist_ok=True)
     settings.reports_dir.mkdir(parents=True, exist_ok=True)
+    settings.pdf_cache_dir.mkdir(parents=True, exist_ok=True)
 
     return settings
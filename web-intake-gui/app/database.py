@@ -1,16 +1,39 @@
 """Database connection and session management."""
 
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.config import get_settings
 from app.models.database import Base
+from app.services.report_service import ReportService
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-)
+
+def _json_serializer(value) -> str:
+    """Encode JSON columns with orjson; also handles dates in report metadata."""
+    return orjson.dumps(value).decode()
+
+
+engine_kwargs = {
+    "echo": settings.debug,
+    "json_serializer": _json_serializer,
+    "json_deserializer": orjson.loads,
+}
+if settings.database_url.startswith("sqlite"):
+    # aiosqlite connections are cheap file handles; don't pool them
+    engine_kwargs["poolclass"] = NullPool
+else:
+    engine_kwargs.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+    )
+
+engine = create_async_engine(settings.database_url, **engine_kwargs)
 
 async_session = async_sessionmaker(
     engine,
@@ -19,16 +42,24 @@ async_session = async_sessionmaker(
 )
 
 
+def _create_tables_and_indexes(conn) -> None:
+    """Create missing tables, plus indexes added to tables that already exist."""
+    Base.metadata.create_all(conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
 async def init_db():
-    """Initialize database tables."""
+    """Initialize database tables and backfill rendered report HTML."""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_tables_and_indexes)
+
+    async with async_session() as session:
+        await ReportService(session).backfill_content_html()
 
 
 async def get_db():
     """Dependency for getting database sessions."""
     async with async_session() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
@@ -1,25 +1,48 @@
 """NOMAD Web Intake GUI - FastAPI Application."""
 
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import time
+from typing import Any
 
+import orjson
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import get_settings
-from app.database import init_db
+from app.database import init_db, async_session
+from app.services import view_counter
+from app.services.pdf_service import run_pdf_cache_janitor, shutdown_pdf_pool
 from app.api import reports_router, sharing_router, health_router, dashboard_router
 
 
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     await init_db()
+    tasks = [
+        asyncio.create_task(_prune_rate_limits()),
+        asyncio.create_task(view_counter.run_periodic_flush(async_session)),
+        asyncio.create_task(run_pdf_cache_janitor()),
+    ]
     yield
-    # Shutdown (nothing to do)
+    # Shutdown
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await view_counter.flush(async_session)
+    shutdown_pdf_pool()
 
 
 settings = get_settings()
@@ -29,35 +52,47 @@ app = FastAPI(
     description="Threat Intelligence Report Sharing Platform",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs" if settings.debug else None,
     redoc_url="/api/redoc" if settings.debug else None,
 )
 
-# Rate limiting middleware (simple in-memory)
+# Rate limiting middleware (simple in-memory, per worker process;
+# multi-worker deployments need a shared store such as Redis INCR/EXPIRE)
 class RateLimiter:
+    """Fixed-window per-IP rate limiter with O(1) checks."""
+
     def __init__(self, requests_per_minute: int = 60):
         self.requests_per_minute = requests_per_minute
-        self.requests = {}
+        # client_ip -> [window (epoch minute), request count]
+        self.buckets: dict[str, list[int]] = {}
     
     def is_allowed(self, client_ip: str) -> bool:
-        now = time.time()
-        # Clean up old requests
-        self.requests = {ip: timestamps for ip, timestamps in self.requests.items() 
-                         if timestamps and timestamps[-1] > now - 60}
-        
-        client_requests = self.requests.get(client_ip, [])
-        # Filter requests from last minute
-        client_requests = [t for t in client_requests if t > now - 60]
+        window = int(time.time() // 60)
+        bucket = self.buckets.get(client_ip)
+        if bucket is None or bucket[0] != window:
+            bucket = self.buckets[client_ip] = [window, 0]
         
-        if len(client_requests) >= self.requests_per_minute:
+        if bucket[1] >= self.requests_per_minute:
             return False
-            
-        client_requests.append(now)
-        self.requests[client_ip] = client_requests
+        
+        bucket[1] += 1
         return True
+    
+    def prune(self):
+        """Drop buckets left over from previous windows."""
+        window = int(time.time() // 60)
+        self.buckets = {ip: b for ip, b in self.buckets.items() if b[0] == window}
 
 limiter = RateLimiter(requests_per_minute=60)
 
+
+async def _prune_rate_limits():
+    """Periodically evict stale rate limit buckets."""
+    while True:
+        await asyncio.sleep(60)
+        limiter.prune()
+
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     # Skip rate limiting for static files and health checks
@@ -66,7 +101,7 @@ async def rate_limit_middleware(request: Request, call_next):
         
     client_ip = request.client.host
     if not limiter.is_allowed(client_ip):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={"detail": "Too many requests"}
         )
@@ -79,6 +114,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
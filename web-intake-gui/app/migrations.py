@@ -0,0 +1,29 @@
+"""
+One-off data migrations.
+
+Run from the web-intake-gui directory with the app's environment, e.g.:
+
+    python -m app.migrations
+"""
+
+import asyncio
+
+from app.database import async_session, init_db
+from app.services.report_service import ReportService
+
+
+async def resanitize_content_html() -> int:
+    """Re-sanitize report HTML stored before supplied HTML was sanitized."""
+    await init_db()
+    async with async_session() as session:
+        return await ReportService(session).resanitize_content_html()
+
+
+def main():
+    """Run all data migrations."""
+    updated = asyncio.run(resanitize_content_html())
+    print(f"Re-sanitized HTML of {updated} reports")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from app.models.report import (
     ReportCreate,
     ReportResponse,
     ReportContent,
+    ReportContentIn,
     ReportMetadata,
     ReportType,
     Classification,
@@ -21,6 +22,7 @@ __all__ = [
     "ReportCreate",
     "ReportResponse",
     "ReportContent",
+    "ReportContentIn",
     "ReportMetadata",
     "ReportType",
     "Classification",
@@ -10,6 +10,7 @@ from sqlalchemy import (
     Boolean,
     Integer,
     ForeignKey,
+    Index,
     JSON,
 )
 from sqlalchemy.orm import declarative_base, relationship
@@ -23,7 +24,7 @@ class ReportDB(Base):
     __tablename__ = "reports"
 
     id = Column(String(32), primary_key=True)
-    report_type = Column(String(50), nullable=False, index=True)
+    report_type = Column(String(50), nullable=False)
     title = Column(String(500), nullable=False)
     organization = Column(String(200), nullable=False)
     classification = Column(String(20), nullable=False, default="INTERNAL")
@@ -44,6 +45,12 @@ class ReportDB(Base):
         "ShareLinkDB", back_populates="report", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_reports_created_at_report_type", "created_at", "report_type"),
+        # Type-filtered listings range-scan this instead of sorting matches
+        Index("ix_reports_report_type_created_at", "report_type", "created_at"),
+    )
+
 
 class ShareLinkDB(Base):
     """Database model for share links."""
@@ -52,7 +59,7 @@ class ShareLinkDB(Base):
 
     id = Column(String(32), primary_key=True)
     report_id = Column(String(32), ForeignKey("reports.id"), nullable=False, index=True)
-    token = Column(String(48), unique=True, nullable=False, index=True)
+    token = Column(String(48), nullable=False)
     password_hash = Column(String(128), nullable=True)
     allow_download = Column(Boolean, nullable=False, default=True)
     expires_at = Column(DateTime, nullable=True)
@@ -61,3 +68,16 @@ class ShareLinkDB(Base):
 
     # Relationships
     report = relationship("ReportDB", back_populates="share_links")
+
+    __table_args__ = (
+        # On PostgreSQL the token index also covers the columns share link
+        # validation reads, so lookups by token skip the table
+        Index(
+            "ix_share_links_token",
+            "token",
+            unique=True,
+            postgresql_include=[
+                "expires_at", "allow_download", "password_hash", "report_id", "id",
+            ],
+        ),
+    )
@@ -4,8 +4,26 @@ from datetime import datetime, date
 from enum import Enum
 from typing import Any
 
-from pydantic import BaseModel, Field, model_validator
-import bleach
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+import nh3
+
+# Sanitizer allowlists for report Markdown, built once
+_MARKDOWN_TAGS = frozenset({
+    'abbr', 'acronym',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'p', 'br', 'hr',
+    'ul', 'ol', 'li',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+    'strong', 'b', 'em', 'i', 'u', 's', 'strike',
+    'code', 'pre', 'blockquote',
+    'a', 'img'
+})
+_MARKDOWN_ATTRIBUTES = {
+    'a': frozenset({'href', 'title', 'target'}),
+    'img': frozenset({'src', 'alt', 'title', 'width', 'height'}),
+    '*': frozenset({'class', 'id'})
+}
+_MARKDOWN_URL_SCHEMES = frozenset({'http', 'https', 'mailto'})
 
 
 class ReportType(str, Enum):
@@ -34,28 +52,19 @@ class ReportContent(BaseModel):
     html: str | None = Field(None, description="Pre-rendered HTML content")
     raw_data: dict[str, Any] | None = Field(None, description="Structured threat data")
 
+
+class ReportContentIn(ReportContent):
+    """Submitted report content, sanitized before it is stored."""
+
     @model_validator(mode='after')
     def sanitize_content(self):
         """Sanitize markdown content to prevent XSS."""
         if self.markdown:
-            self.markdown = bleach.clean(
+            self.markdown = nh3.clean(
                 self.markdown,
-                tags=bleach.sanitizer.ALLOWED_TAGS + [
-                    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 
-                    'p', 'br', 'hr', 
-                    'ul', 'ol', 'li', 
-                    'table', 'thead', 'tbody', 'tr', 'th', 'td',
-                    'strong', 'b', 'em', 'i', 'u', 's', 'strike',
-                    'code', 'pre', 'blockquote', 
-                    'a', 'img'
-                ],
-                attributes={
-                    'a': ['href', 'title', 'target'],
-                    'img': ['src', 'alt', 'title', 'width', 'height'],
-                    '*': ['class', 'id']
-                },
-                protocols=['http', 'https', 'mailto'],
-                strip=True
+                tags=_MARKDOWN_TAGS,
+                attributes=_MARKDOWN_ATTRIBUTES,
+                url_schemes=_MARKDOWN_URL_SCHEMES,
             )
         return self
 
@@ -82,7 +91,7 @@ class ReportCreate(BaseModel):
     report_type: ReportType
     title: str = Field(..., min_length=1, max_length=500)
     organization: str = Field(..., min_length=1, max_length=200)
-    content: ReportContent
+    content: ReportContentIn
     metadata: ReportMetadata | None = None
     classification: Classification = Classification.INTERNAL
     generated_at: datetime | None = None
@@ -101,8 +110,7 @@ class Report(BaseModel):
     generated_at: datetime
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class ReportResponse(BaseModel):
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ScheduleFrequency(str, Enum):
@@ -62,8 +62,7 @@ class ScheduledReport(BaseModel):
     run_count: int = 0
     last_status: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class ScheduledReportResponse(BaseModel):
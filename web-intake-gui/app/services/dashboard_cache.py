@@ -0,0 +1,47 @@
+"""Access to the NOMAD framework's SQLite threat cache for the dashboard."""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_SRC = Path(__file__).parent.parent.parent.parent.parent / "src"
+
+# Seconds to wait before retrying after the cache failed to open
+_RETRY_SECONDS = 30
+
+_cache_db = None
+_retry_at = 0.0
+
+
+def get_cache_or_none():
+    """
+    Get the shared CacheDatabase, or None if the cache is unavailable.
+
+    The cache is opened once per process. If opening fails (e.g. the
+    database is locked while the collector writes), the dashboard falls
+    back to its defaults and the open is retried after _RETRY_SECONDS.
+    """
+    global _cache_db, _retry_at
+
+    if _cache_db is not None:
+        return _cache_db
+
+    now = time.monotonic()
+    if now < _retry_at:
+        return None
+
+    if str(_SRC) not in sys.path:
+        sys.path.insert(0, str(_SRC))
+
+    try:
+        from cache import CacheDatabase
+
+        _cache_db = CacheDatabase()
+    except Exception as e:
+        _retry_at = now + _RETRY_SECONDS
+        logger.warning("Threat cache not available, using defaults: %s", e)
+
+    return _cache_db
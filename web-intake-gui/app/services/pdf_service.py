@@ -1,17 +1,215 @@
 """PDF generation service."""
 
-import markdown
-import bleach
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from html import escape
+from operator import attrgetter
+
 from pathlib import Path
 
+import mistune
+import nh3
+
+from app.config import get_settings
 from app.models.report import Report
 
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_PRUNE_INTERVAL_SECONDS = 3600
+
+# WeasyPrint is CPU-bound and single-threaded, so renders run in worker
+# processes. One slot per worker means a submitted render starts at once,
+# so the timeout measures rendering rather than queueing in the pool.
+_PDF_WORKERS = os.cpu_count() or 1
+_pdf_slots = asyncio.Semaphore(_PDF_WORKERS)
+
+
+def _new_pdf_pool() -> ProcessPoolExecutor:
+    """Start a PDF worker pool; workers spawn lazily on first use."""
+    return ProcessPoolExecutor(
+        max_workers=_PDF_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+_pdf_pool = _new_pdf_pool()
+
+
+# Report type display names
+_TYPE_NAMES = {
+    "executive-brief": "Executive Threat Intelligence Brief",
+    "technical-alert": "Technical Security Alert",
+    "weekly-summary": "Weekly Threat Summary",
+    "threats": "Threat Intelligence Report",
+    "cve-analysis": "CVE Analysis Report",
+    "critical": "Critical Threat Alert",
+}
+
+# Metadata items shown in the PDF header, in display order:
+# (getter, pre-rendered label, formatter)
+_META_SPEC = (
+    (attrgetter("threat_count"), "<strong>Total Threats:</strong> ", str),
+    (attrgetter("critical_count"), "<strong>Critical:</strong> ", str),
+    (attrgetter("high_count"), "<strong>High:</strong> ", str),
+    (attrgetter("kev_count"), "<strong>KEV Listed:</strong> ", str),
+    (attrgetter("crown_jewels_affected"), "<strong>Affected Systems:</strong> ", ", ".join),
+    (attrgetter("cve_id"), "<strong>CVE:</strong> ", str),
+    (attrgetter("cvss_score"), "<strong>CVSS:</strong> ", str),
+    (attrgetter("epss_score"), "<strong>EPSS:</strong> ", "{:.1%}".format),
+)
+
+# Parsed once per worker process and applied to every PDF (see _weasyprint)
+_PDF_CSS_PATH = Path(__file__).parent.parent / "static" / "report.css"
+
+_METADATA_TEMPLATE = """
+                <div class="metadata">
+                    {items}
+                </div>
+                """
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+</head>
+<body>
+    <div class="header">
+        <span class="classification {classification}">{classification}</span>
+        <h1>{report_type_name}</h1>
+        <div class="subtitle">
+            <strong>{organization}</strong> &nbsp;|&nbsp;
+            Generated: {generated}
+        </div>
+    </div>
+
+    {metadata}
+
+    <div class="content">
+        {content}
+    </div>
+
+    <div class="footer">
+        Generated by NOMAD Threat Intelligence Framework
+    </div>
+</body>
+</html>"""
+
+
+@lru_cache(maxsize=1)
+def _weasyprint():
+    """
+    Import WeasyPrint and build the shared font configuration and parsed
+    stylesheet, once per worker process.
+    """
+    try:
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:
+        raise RuntimeError("WeasyPrint is not installed. Install with: pip install weasyprint")
+
+    font_config = FontConfiguration()
+    stylesheet = CSS(filename=str(_PDF_CSS_PATH), font_config=font_config)
+    return HTML, font_config, stylesheet
+
+
+def _render_pdf(html_content: str, output_path: str | None = None) -> bytes | None:
+    """
+    Render an HTML document to PDF (runs in a worker process).
+
+    Writes to output_path when given and returns None, so the document is
+    never copied back to the server process; otherwise returns the bytes.
+    """
+    HTML, font_config, stylesheet = _weasyprint()
+
+    return HTML(string=html_content).write_pdf(
+        target=output_path, stylesheets=[stylesheet], font_config=font_config
+    )
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the PDF worker processes."""
+    _pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _recycle_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Replace a PDF worker pool and kill its processes.
+
+    A hung render can only be stopped by killing its worker, and the pool
+    can't say which worker that is, so the whole pool goes. Other renders
+    still running in it fail with BrokenProcessPool and are retried.
+    """
+    global _pdf_pool
+    if _pdf_pool is pool:
+        _pdf_pool = _new_pdf_pool()
+
+    # The executor has no public handle on its workers
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _release_pdf_slot(future: asyncio.Future) -> None:
+    """Free a render slot when its worker finishes, even if nobody awaits it."""
+    _pdf_slots.release()
+    if not future.cancelled():
+        # Retrieve the result so abandoned failures aren't logged as unhandled
+        future.exception()
+
+
+def prune_pdf_cache() -> int:
+    """
+    Delete cached PDFs not served within the configured max age.
+
+    Also deletes temporary files left by renders that timed out: the worker
+    can still write its output after get_or_generate_pdf gave up on it.
+    Renders write their file in one go at the end, so a temporary file
+    untouched for longer than the render timeout is no longer in use.
+    """
+    settings = get_settings()
+    now = time.time()
+    cutoffs = (
+        ("*.pdf", now - settings.pdf_cache_max_age_hours * 3600),
+        ("*.tmp", now - settings.pdf_timeout_seconds),
+    )
+    removed = 0
+
+    for pattern, cutoff in cutoffs:
+        for path in settings.pdf_cache_dir.glob(pattern):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+    return removed
+
+
+async def run_pdf_cache_janitor() -> None:
+    """Periodically evict stale cached PDFs and abandoned temporary files."""
+    while True:
+        await asyncio.sleep(PDF_CACHE_PRUNE_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(prune_pdf_cache)
+        except Exception as e:
+            logger.warning("Failed to prune PDF cache: %s", e)
+
 
 class PDFService:
     """Service for generating PDF reports."""
 
     # Allowed HTML tags for sanitization
-    ALLOWED_TAGS = [
+    ALLOWED_TAGS = frozenset({
         "h1", "h2", "h3", "h4", "h5", "h6",
         "p", "br", "hr",
         "ul", "ol", "li",
@@ -21,42 +219,35 @@ class PDFService:
         "blockquote",
         "a", "img",
         "div", "span",
-    ]
+    })
+
+    ALLOWED_PROTOCOLS = frozenset({"http", "https", "mailto"})
 
     ALLOWED_ATTRIBUTES = {
-        "a": ["href", "title"],
-        "img": ["src", "alt", "title"],
-        "th": ["colspan", "rowspan"],
-        "td": ["colspan", "rowspan"],
-        "*": ["class", "id"],
+        "a": frozenset({"href", "title"}),
+        "img": frozenset({"src", "alt", "title"}),
+        "th": frozenset({"colspan", "rowspan"}),
+        "td": frozenset({"colspan", "rowspan"}),
+        "*": frozenset({"class", "id"}),
     }
 
     def __init__(self):
-        self.md = markdown.Markdown(
-            extensions=[
-                "tables",
-                "fenced_code",
-                "codehilite",
-                "toc",
-                "nl2br",
-            ]
-        )
+        # Raw HTML passes through to nh3; hard_wrap keeps single newlines as <br>
+        self.md = mistune.create_markdown(escape=False, hard_wrap=True, plugins=["table"])
 
     def markdown_to_html(self, md_content: str) -> str:
         """Convert markdown to sanitized HTML."""
-        html = self.md.convert(md_content)
-        self.md.reset()
+        return self.sanitize_html(self.md(md_content))
 
-        # Sanitize HTML
-        clean_html = bleach.clean(
+    def sanitize_html(self, html: str) -> str:
+        """Reduce HTML to the tags, attributes and URL schemes reports may use."""
+        return nh3.clean(
             html,
             tags=self.ALLOWED_TAGS,
             attributes=self.ALLOWED_ATTRIBUTES,
-            strip=True,
+            url_schemes=self.ALLOWED_PROTOCOLS,
         )
 
-        return clean_html
-
     def generate_pdf_html(self, report: Report) -> str:
         """Generate full HTML document for PDF conversion."""
         content_html = report.content.html or self.markdown_to_html(report.content.markdown)
@@ -68,222 +259,116 @@ class PDFService:
             meta_items = []
 
             if meta.period_start and meta.period_end:
-                meta_items.append(f"<strong>Period:</strong> {meta.period_start} to {meta.period_end}")
-
-            if meta.threat_count is not None:
-                meta_items.append(f"<strong>Total Threats:</strong> {meta.threat_count}")
-
-            if meta.critical_count is not None:
-                meta_items.append(f"<strong>Critical:</strong> {meta.critical_count}")
-
-            if meta.high_count is not None:
-                meta_items.append(f"<strong>High:</strong> {meta.high_count}")
-
-            if meta.kev_count is not None:
-                meta_items.append(f"<strong>KEV Listed:</strong> {meta.kev_count}")
-
-            if meta.crown_jewels_affected:
-                meta_items.append(f"<strong>Affected Systems:</strong> {', '.join(meta.crown_jewels_affected)}")
-
-            if meta.cve_id:
-                meta_items.append(f"<strong>CVE:</strong> {meta.cve_id}")
-
-            if meta.cvss_score is not None:
-                meta_items.append(f"<strong>CVSS:</strong> {meta.cvss_score}")
-
-            if meta.epss_score is not None:
-                meta_items.append(f"<strong>EPSS:</strong> {meta.epss_score:.1%}")
+                meta_items.append(
+                    f"<strong>Period:</strong> {meta.period_start} to {meta.period_end}"
+                )
+
+            # Empty strings and lists are skipped; zero counts are still shown
+            meta_items += [
+                label + escape(fmt(value))
+                for get, label, fmt in _META_SPEC
+                if (value := get(meta)) is not None and value != "" and value != []
+            ]
 
             if meta_items:
-                metadata_html = f"""
-                <div class="metadata">
-                    {' &nbsp;|&nbsp; '.join(meta_items)}
-                </div>
-                """
-
-        # Report type display names
-        type_names = {
-            "executive-brief": "Executive Threat Intelligence Brief",
-            "technical-alert": "Technical Security Alert",
-            "weekly-summary": "Weekly Threat Summary",
-            "threats": "Threat Intelligence Report",
-            "cve-analysis": "CVE Analysis Report",
-            "critical": "Critical Threat Alert",
-        }
-
-        report_type_name = type_names.get(report.report_type.value, report.report_type.value)
-
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{report.title}</title>
-    <style>
-        @page {{
-            size: A4;
-            margin: 2cm;
-        }}
-
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-            font-size: 11pt;
-            line-height: 1.5;
-            color: #1a1a1a;
-            max-width: 100%;
-        }}
-
-        .header {{
-            border-bottom: 3px solid #2563eb;
-            padding-bottom: 1rem;
-            margin-bottom: 1.5rem;
-        }}
-
-        .header h1 {{
-            margin: 0 0 0.5rem 0;
-            font-size: 18pt;
-            color: #1e40af;
-        }}
-
-        .header .subtitle {{
-            color: #6b7280;
-            font-size: 10pt;
-        }}
-
-        .classification {{
-            display: inline-block;
-            padding: 0.25rem 0.75rem;
-            background: #fef3c7;
-            color: #92400e;
-            font-size: 9pt;
-            font-weight: 600;
-            border-radius: 4px;
-            margin-bottom: 0.5rem;
-        }}
-
-        .classification.CONFIDENTIAL {{
-            background: #fee2e2;
-            color: #991b1b;
-        }}
-
-        .classification.PUBLIC {{
-            background: #d1fae5;
-            color: #065f46;
-        }}
-
-        .metadata {{
-            background: #f3f4f6;
-            padding: 0.75rem 1rem;
-            border-radius: 6px;
-            font-size: 9pt;
-            color: #4b5563;
-            margin-bottom: 1.5rem;
-        }}
-
-        h1 {{ font-size: 16pt; color: #1e40af; margin-top: 1.5rem; }}
-        h2 {{ font-size: 14pt; color: #1e40af; margin-top: 1.25rem; border-bottom: 1px solid #e5e7eb; padding-bottom: 0.25rem; }}
-        h3 {{ font-size: 12pt; color: #374151; margin-top: 1rem; }}
-        h4 {{ font-size: 11pt; color: #374151; margin-top: 0.75rem; }}
-
-        p {{ margin: 0.75rem 0; }}
-
-        ul, ol {{ margin: 0.5rem 0; padding-left: 1.5rem; }}
-        li {{ margin: 0.25rem 0; }}
-
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin: 1rem 0;
-            font-size: 10pt;
-        }}
-
-        th, td {{
-            border: 1px solid #d1d5db;
-            padding: 0.5rem;
-            text-align: left;
-        }}
-
-        th {{
-            background: #f3f4f6;
-            font-weight: 600;
-        }}
-
-        code {{
-            background: #f3f4f6;
-            padding: 0.125rem 0.375rem;
-            border-radius: 3px;
-            font-family: "SF Mono", Monaco, "Courier New", monospace;
-            font-size: 9pt;
-        }}
-
-        pre {{
-            background: #1f2937;
-            color: #f9fafb;
-            padding: 1rem;
-            border-radius: 6px;
-            overflow-x: auto;
-            font-size: 9pt;
-        }}
-
-        pre code {{
-            background: none;
-            padding: 0;
-            color: inherit;
-        }}
-
-        blockquote {{
-            border-left: 4px solid #2563eb;
-            margin: 1rem 0;
-            padding: 0.5rem 1rem;
-            background: #eff6ff;
-            color: #1e40af;
-        }}
-
-        .critical {{ color: #dc2626; font-weight: 600; }}
-        .high {{ color: #ea580c; font-weight: 600; }}
-        .medium {{ color: #ca8a04; }}
-        .low {{ color: #16a34a; }}
-
-        .footer {{
-            margin-top: 2rem;
-            padding-top: 1rem;
-            border-top: 1px solid #e5e7eb;
-            font-size: 9pt;
-            color: #6b7280;
-            text-align: center;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <span class="classification {report.classification.value}">{report.classification.value}</span>
-        <h1>{report_type_name}</h1>
-        <div class="subtitle">
-            <strong>{report.organization}</strong> &nbsp;|&nbsp;
-            Generated: {report.generated_at.strftime("%B %d, %Y at %H:%M UTC")}
-        </div>
-    </div>
-
-    {metadata_html}
-
-    <div class="content">
-        {content_html}
-    </div>
+                metadata_html = _METADATA_TEMPLATE.format(
+                    items=" &nbsp;|&nbsp; ".join(meta_items)
+                )
+
+        report_type = report.report_type.value
+
+        return _HTML_TEMPLATE.format_map({
+            "title": escape(report.title),
+            "classification": report.classification.value,
+            "report_type_name": _TYPE_NAMES.get(report_type, report_type),
+            "organization": escape(report.organization),
+            "generated": report.generated_at.strftime("%B %d, %Y at %H:%M UTC"),
+            "metadata": metadata_html,
+            "content": content_html,
+        })
+
+    async def generate_pdf(
+        self, report: Report, output_path: Path | None = None
+    ) -> bytes | None:
+        """
+        Generate PDF from report in the worker pool.
+
+        Returns the PDF bytes, or writes them to output_path and returns None.
+        """
+        html_content = self.generate_pdf_html(report)
+        target = str(output_path) if output_path is not None else None
+        timeout = get_settings().pdf_timeout_seconds
 
-    <div class="footer">
-        Generated by NOMAD Threat Intelligence Framework
-    </div>
-</body>
-</html>"""
+        try:
+            return await self._render_in_pool(html_content, target, timeout)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed) or the pool was recycled after
+            # another render timed out; retry once on the replacement pool
+            return await self._render_in_pool(html_content, target, timeout)
+
+    @staticmethod
+    async def _render_in_pool(
+        html_content: str, target: str | None, timeout: float
+    ) -> bytes | None:
+        """Run one render in the worker pool, recycling the pool on failure."""
+        await _pdf_slots.acquire()
+        pool = _pdf_pool
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                pool, _render_pdf, html_content, target
+            )
+        except BrokenProcessPool:
+            _pdf_slots.release()
+            _recycle_pdf_pool(pool)
+            raise
+        except BaseException:
+            _pdf_slots.release()
+            raise
+
+        # The slot is freed when the worker finishes or is killed, not when
+        # the caller gives up waiting
+        future.add_done_callback(_release_pdf_slot)
 
-        return html
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            _recycle_pdf_pool(pool)
+            raise RuntimeError(f"PDF generation timed out after {timeout} seconds")
+        except BrokenProcessPool:
+            _recycle_pdf_pool(pool)
+            raise
+
+    @staticmethod
+    def cache_key(report: Report) -> str:
+        """Stable key identifying a report version's PDF."""
+        return hashlib.sha256(
+            f"{report.id}:{report.generated_at.isoformat()}".encode()
+        ).hexdigest()
+
+    @classmethod
+    def cache_path(cls, report: Report) -> Path:
+        """Cache location for a report's PDF, keyed by report version."""
+        return get_settings().pdf_cache_dir / f"{cls.cache_key(report)}.pdf"
+
+    async def get_or_generate_pdf(self, report: Report) -> Path:
+        """Return the path to the report's PDF, generating it on a cache miss."""
+        path = self.cache_path(report)
+
+        if path.exists():
+            # Refresh mtime so the janitor evicts least recently served first
+            os.utime(path)
+            return path
+
+        # Render straight to a unique temporary file and rename it into
+        # place, so readers never see partial files
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        tmp_path = Path(tmp_name)
 
-    async def generate_pdf(self, report: Report) -> bytes:
-        """Generate PDF from report."""
         try:
-            from weasyprint import HTML
-        except ImportError:
-            raise RuntimeError("WeasyPrint is not installed. Install with: pip install weasyprint")
+            await self.generate_pdf(report, output_path=tmp_path)
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
-        html_content = self.generate_pdf_html(report)
-        html = HTML(string=html_content)
-        return html.write_pdf()
+        return path
@@ -1,9 +1,11 @@
 """Report management service."""
 
-import secrets
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
+from os import urandom
 
-from sqlalchemy import select, desc
+from sqlalchemy import Row, bindparam, select, desc, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.database import ReportDB
@@ -15,6 +17,26 @@ from app.models.report import (
     ReportType,
     Classification,
 )
+from app.services.pdf_service import PDFService
+
+# Markdown renderer and HTML sanitizer shared by all report ingests
+_renderer = PDFService()
+
+_set_content_html = (
+    ReportDB.__table__.update()
+    .where(ReportDB.__table__.c.id == bindparam("report_id"))
+    .values(content_html=bindparam("content_html"))
+)
+
+# Stored enum values to members, skipping Enum's value lookup per row
+_REPORT_TYPES = {t.value: t for t in ReportType}
+_CLASSIFICATIONS = {c.value: c for c in Classification}
+
+# Recently fetched reports. Reports are never updated after creation, so
+# the TTL only bounds how long another worker may serve a deleted report
+_RECENT_TTL_SECONDS = 30
+_RECENT_MAX_ENTRIES = 1024
+_recent_reports: dict[str, tuple[float, Report]] = {}
 
 
 class ReportService:
@@ -26,12 +48,40 @@ class ReportService:
     @staticmethod
     def generate_id() -> str:
         """Generate a unique report ID."""
-        return f"rpt_{secrets.token_urlsafe(16)}"
+        return (b"rpt_" + urlsafe_b64encode(urandom(16)).rstrip(b"=")).decode("ascii")
+
+    @staticmethod
+    def encode_cursor(report: Report) -> str:
+        """Build an opaque list cursor pointing past the given report."""
+        raw = f"{report.created_at.isoformat()}|{report.id}".encode()
+        return urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, str]:
+        """Parse a list cursor into (created_at, id); raises ValueError if malformed."""
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, report_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), report_id
+
+    @staticmethod
+    def render_content_html(markdown: str, html: str | None = None) -> str:
+        """
+        Render report HTML once at ingest so views never parse Markdown.
+
+        Supplied HTML is served as-is on public share pages, so it goes
+        through the same allowlist as rendered Markdown.
+        """
+        if html is None:
+            return _renderer.markdown_to_html(markdown)
+        return _renderer.sanitize_html(html)
 
     async def create(self, report_data: ReportCreate) -> Report:
         """Create a new report."""
         report_id = self.generate_id()
         now = datetime.utcnow()
+        content_html = self.render_content_html(
+            report_data.content.markdown, report_data.content.html
+        )
 
         db_report = ReportDB(
             id=report_id,
@@ -40,7 +90,7 @@ class ReportService:
             organization=report_data.organization,
             classification=report_data.classification.value,
             content_markdown=report_data.content.markdown,
-            content_html=report_data.content.html,
+            content_html=content_html,
             content_raw_data=report_data.content.raw_data,
             metadata_json=report_data.metadata.model_dump() if report_data.metadata else None,
             generated_at=report_data.generated_at or now,
@@ -49,12 +99,16 @@ class ReportService:
 
         self.db.add(db_report)
         await self.db.commit()
-        await self.db.refresh(db_report)
 
         return self._to_model(db_report)
 
     async def get(self, report_id: str) -> Report | None:
         """Get a report by ID."""
+        now = time.monotonic()
+        cached = _recent_reports.get(report_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
         result = await self.db.execute(
             select(ReportDB).where(ReportDB.id == report_id)
         )
@@ -63,26 +117,93 @@ class ReportService:
         if db_report is None:
             return None
 
-        return self._to_model(db_report)
+        report = self._to_model(db_report)
+        if len(_recent_reports) >= _RECENT_MAX_ENTRIES:
+            _recent_reports.clear()
+        _recent_reports[report_id] = (now + _RECENT_TTL_SECONDS, report)
+        return report
 
     async def list(
         self,
         report_type: ReportType | None = None,
         limit: int = 50,
         offset: int = 0,
+        before: tuple[datetime, str] | None = None,
     ) -> list[Report]:
-        """List reports with optional filtering."""
-        query = select(ReportDB).order_by(desc(ReportDB.created_at))
+        """
+        List reports with optional filtering, newest first.
+
+        Pass the (created_at, id) of the last report on the previous page as
+        ``before`` to page through the index instead of skipping rows; the
+        offset is ignored in that case.
+        """
+        # Plain column rows skip ORM identity-map bookkeeping; they expose
+        # the same attribute names that _to_model reads. The ID breaks ties
+        # between reports created in the same instant.
+        query = select(*ReportDB.__table__.columns).order_by(
+            desc(ReportDB.created_at), desc(ReportDB.id)
+        )
 
         if report_type:
             query = query.where(ReportDB.report_type == report_type.value)
 
-        query = query.limit(limit).offset(offset)
+        if before:
+            query = query.where(tuple_(ReportDB.created_at, ReportDB.id) < before)
+        else:
+            query = query.offset(offset)
+
+        query = query.limit(limit)
 
         result = await self.db.execute(query)
+
+        return [self._to_model(row) for row in result]
+
+    async def backfill_content_html(self) -> int:
+        """Render HTML for reports stored before it was rendered at ingest."""
+        result = await self.db.execute(
+            select(ReportDB).where(ReportDB.content_html.is_(None))
+        )
         db_reports = result.scalars().all()
 
-        return [self._to_model(r) for r in db_reports]
+        for db_report in db_reports:
+            db_report.content_html = self.render_content_html(db_report.content_markdown)
+
+        if db_reports:
+            await self.db.commit()
+        return len(db_reports)
+
+    async def resanitize_content_html(self, batch_size: int = 500) -> int:
+        """
+        Re-sanitize all stored report HTML, in batches of batch_size rows.
+
+        One-off migration for HTML stored before supplied HTML was
+        sanitized (see app.migrations). Returns the number of reports updated.
+        """
+        updated = 0
+        last_id = ""
+
+        while True:
+            result = await self.db.execute(
+                select(ReportDB.id, ReportDB.content_markdown, ReportDB.content_html)
+                .where(ReportDB.id > last_id)
+                .order_by(ReportDB.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return updated
+
+            updates = []
+            for report_id, markdown, html in rows:
+                content_html = self.render_content_html(markdown, html)
+                if content_html != html:
+                    updates.append({"report_id": report_id, "content_html": content_html})
+
+            if updates:
+                await self.db.execute(_set_content_html, updates)
+                await self.db.commit()
+            updated += len(updates)
+            last_id = rows[-1].id
 
     async def delete(self, report_id: str) -> bool:
         """Delete a report."""
@@ -94,14 +215,18 @@ class ReportService:
         if db_report is None:
             return False
 
+        pdf_path = PDFService.cache_path(self._to_model(db_report, include_raw_data=False))
+
         await self.db.delete(db_report)
         await self.db.commit()
+        _recent_reports.pop(report_id, None)
+
+        # Don't leave a deleted report's content on disk until the janitor runs
+        pdf_path.unlink(missing_ok=True)
         return True
 
     async def count(self, report_type: ReportType | None = None) -> int:
         """Count reports."""
-        from sqlalchemy import func
-
         query = select(func.count(ReportDB.id))
 
         if report_type:
@@ -111,19 +236,25 @@ class ReportService:
         return result.scalar() or 0
 
     @staticmethod
-    def _to_model(db_report: ReportDB) -> Report:
-        """Convert database model to Pydantic model."""
-        return Report(
+    def _to_model(db_report: ReportDB | Row, include_raw_data: bool = True) -> Report:
+        """
+        Convert a database model or reports row to Pydantic model.
+
+        Stored rows were validated and sanitized on ingest, so the models
+        are built without re-running validators.
+        """
+        return Report.model_construct(
             id=db_report.id,
-            report_type=ReportType(db_report.report_type),
+            report_type=_REPORT_TYPES[db_report.report_type],
             title=db_report.title,
             organization=db_report.organization,
-            classification=Classification(db_report.classification),
-            content=ReportContent(
+            classification=_CLASSIFICATIONS[db_report.classification],
+            content=ReportContent.model_construct(
                 markdown=db_report.content_markdown,
                 html=db_report.content_html,
-                raw_data=db_report.content_raw_data,
+                raw_data=db_report.content_raw_data if include_raw_data else None,
             ),
+            # Metadata is still validated so dates stored as JSON strings are parsed
             metadata=ReportMetadata(**db_report.metadata_json) if db_report.metadata_json else None,
             generated_at=db_report.generated_at,
             created_at=db_report.created_at,
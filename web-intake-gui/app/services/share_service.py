@@ -1,16 +1,30 @@
 """Share link management service."""
 
-import secrets
+import asyncio
+from base64 import urlsafe_b64encode
 from datetime import datetime, timedelta
+from os import urandom
 
-from passlib.hash import bcrypt
-from sqlalchemy import select, update
+from passlib.context import CryptContext
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, load_only
 
 from app.models.database import ShareLinkDB, ReportDB
+from app.models.report import Report
 from app.models.share import ShareLink, ShareLinkCreate
+from app.services import view_counter
+from app.services.report_service import ReportService
 from app.config import get_settings
 
+# New share passwords use argon2id; existing bcrypt hashes still verify
+_pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+
+
+async def _verify_password(password: str, password_hash: str) -> bool:
+    """Verify a share password, running the KDF off the event loop."""
+    return await asyncio.to_thread(_pwd_context.verify, password, password_hash)
+
 
 class ShareService:
     """Service for managing share links."""
@@ -21,12 +35,13 @@ class ShareService:
 
     def generate_token(self) -> str:
         """Generate a unique share token."""
-        return f"sh_{secrets.token_urlsafe(self.settings.share_token_length)}"
+        token = urlsafe_b64encode(urandom(self.settings.share_token_length)).rstrip(b"=")
+        return (b"sh_" + token).decode("ascii")
 
     @staticmethod
     def generate_id() -> str:
         """Generate a unique share link ID."""
-        return f"shl_{secrets.token_urlsafe(16)}"
+        return (b"shl_" + urlsafe_b64encode(urandom(16)).rstrip(b"=")).decode("ascii")
 
     async def create(
         self, report_id: str, share_data: ShareLinkCreate, base_url: str
@@ -51,7 +66,7 @@ class ShareService:
         # Hash password if provided
         password_hash = None
         if share_data.password:
-            password_hash = bcrypt.hash(share_data.password)
+            password_hash = await asyncio.to_thread(_pwd_context.hash, share_data.password)
 
         db_share = ShareLinkDB(
             id=share_id,
@@ -65,7 +80,6 @@ class ShareService:
 
         self.db.add(db_share)
         await self.db.commit()
-        await self.db.refresh(db_share)
 
         share_link = self._to_model(db_share)
         share_url = f"{base_url.rstrip('/')}/s/{token}"
@@ -86,19 +100,36 @@ class ShareService:
 
     async def validate_and_get_report(
         self, token: str, password: str | None = None
-    ) -> tuple[str, bool] | tuple[None, str]:
+    ) -> tuple[Report, bool] | tuple[None, str]:
         """
-        Validate share link and return report ID if valid.
-        Returns (report_id, allow_download) on success, (None, error_message) on failure.
+        Validate share link and return its report if valid.
+        Returns (report, allow_download) on success, (None, error_message) on failure.
+
+        The share link and report are loaded together in a single joined query.
         """
         result = await self.db.execute(
-            select(ShareLinkDB).where(ShareLinkDB.token == token)
+            select(ShareLinkDB, ReportDB)
+            .join(ShareLinkDB.report)
+            .where(ShareLinkDB.token == token)
+            .options(
+                # Only the columns covered by ix_share_links_token
+                load_only(
+                    ShareLinkDB.id,
+                    ShareLinkDB.report_id,
+                    ShareLinkDB.expires_at,
+                    ShareLinkDB.password_hash,
+                    ShareLinkDB.allow_download,
+                ),
+                defer(ReportDB.content_raw_data),
+            )
         )
-        db_share = result.scalar_one_or_none()
+        row = result.one_or_none()
 
-        if db_share is None:
+        if row is None:
             return None, "Share link not found"
 
+        db_share, db_report = row
+
         # Check expiry
         if db_share.expires_at and datetime.utcnow() > db_share.expires_at:
             return None, "Share link has expired"
@@ -107,18 +138,14 @@ class ShareService:
         if db_share.password_hash:
             if not password:
                 return None, "Password required"
-            if not bcrypt.verify(password, db_share.password_hash):
+            if not await _verify_password(password, db_share.password_hash):
                 return None, "Invalid password"
 
-        # Increment view count
-        await self.db.execute(
-            update(ShareLinkDB)
-            .where(ShareLinkDB.id == db_share.id)
-            .values(view_count=ShareLinkDB.view_count + 1)
-        )
-        await self.db.commit()
+        # Count the view; written back in batches off the request path
+        view_counter.record_view(db_share.id)
 
-        return db_share.report_id, db_share.allow_download
+        report = ReportService._to_model(db_report, include_raw_data=False)
+        return report, db_share.allow_download
 
     async def list_for_report(self, report_id: str) -> list[ShareLink]:
         """List all share links for a report."""
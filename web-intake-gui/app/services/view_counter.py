@@ -0,0 +1,69 @@
+"""Batched share link view counting."""
+
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy import bindparam
+
+from app.models.database import ShareLinkDB
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 5
+
+# Views recorded since the last flush, keyed by share link ID
+_pending: Counter[str] = Counter()
+_flush_lock = asyncio.Lock()
+
+_increment_views = (
+    ShareLinkDB.__table__.update()
+    .where(ShareLinkDB.__table__.c.id == bindparam("share_id"))
+    .values(view_count=ShareLinkDB.__table__.c.view_count + bindparam("views"))
+)
+
+
+def record_view(share_id: str) -> None:
+    """Count a share link view; it is persisted on the next flush."""
+    _pending[share_id] += 1
+
+
+async def flush(session_factory) -> int:
+    """
+    Write pending view counts in a single batched UPDATE.
+
+    Returns the number of share links updated. Counts stay pending until
+    the write commits, so a failed or cancelled flush loses nothing.
+    """
+    async with _flush_lock:
+        if not _pending:
+            return 0
+
+        batch = dict(_pending)
+
+        async with session_factory() as session:
+            await session.execute(
+                _increment_views,
+                [{"share_id": k, "views": v} for k, v in batch.items()],
+            )
+            await session.commit()
+
+            # No await since the commit, so cancellation can't land between
+            # writing the counts and dropping them; views recorded during
+            # the write stay pending
+            _pending.subtract(batch)
+            for share_id in batch:
+                if _pending[share_id] <= 0:
+                    del _pending[share_id]
+
+        return len(batch)
+
+
+async def run_periodic_flush(session_factory) -> None:
+    """Flush pending view counts every FLUSH_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            await flush(session_factory)
+        except Exception as e:
+            logger.warning("Failed to flush share view counts: %s", e)